@@ -3,20 +3,39 @@ LeLook MCP Server
 Le Chat finds you look
 """
 
+import asyncio
+import logging
 import os
 from typing import Annotated, Literal, List, Dict, Any, TypedDict, Optional
 
 from fastmcp import FastMCP
 from dotenv import load_dotenv
+from starlette.requests import Request
+from starlette.responses import Response
 from search_products import (
+    preload_cross_encoder,
     search_products,
 )
 from virtual_try_on import virtual_try_on
 from compare_products import compare_products, ComparedProduct, generate_html_table
-from virtual_try_on_html_generator import generate_virtual_try_on_html_from_result
+from virtual_try_on_html_generator import (
+    STYLESHEET,
+    generate_virtual_try_on_html_from_result,
+)
+from vector_database import preload_vector_db
 
 load_dotenv()
 
+# Fall back to INFO rather than failing at import on an unknown LOG_LEVEL
+_log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+logging.basicConfig(
+    level=logging.getLevelNamesMapping().get(_log_level, logging.INFO),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+# httpx logs every request URL at INFO, and SerpAPI URLs carry the api_key
+for _logger_name in ("httpx", "httpcore"):
+    logging.getLogger(_logger_name).setLevel(logging.WARNING)
+
 
 # Product data structure definition
 class Product(TypedDict):
@@ -37,6 +56,16 @@ class Product(TypedDict):
 mcp = FastMCP("LeLook MCP Server", port=8080, stateless_http=True, debug=True)
 
 
+@mcp.custom_route("/static/virtual_try_on.css", methods=["GET"])
+async def virtual_try_on_stylesheet(request: Request) -> Response:
+    """Serve the virtual try-on page stylesheet with browser caching"""
+    return Response(
+        STYLESHEET,
+        media_type="text/css",
+        headers={"Cache-Control": "public, max-age=86400"},
+    )
+
+
 def get_openrouter_api_key():
     """Get OpenRouter API key from environment variable"""
     return os.getenv("OPENROUTER_API_KEY", "your_openrouter_api_key_here")
@@ -119,7 +148,7 @@ Always clarify needs, fill in missing details, and use the tools in this EXACT o
 
 
 @mcp.tool()
-def search_products_tool(
+async def search_products_tool(
     query: Annotated[str, "The search query for the desired products."],
     category: Annotated[
         Literal["clothing", "furniture", "other", "phone", "car", "house"],
@@ -140,13 +169,22 @@ def search_products_tool(
 
     Use this tool to help users discover and browse products that fit their preferences and requirements.
     """
-    return search_products(
-        query, num_results, min_price, max_price, free_shipping, on_sale, category
+    # Run the blocking search (HTTP, JSON decoding, embedding, Qdrant upsert)
+    # in a worker thread so it does not stall other tool calls on the event loop
+    return await asyncio.to_thread(
+        search_products,
+        query,
+        num_results,
+        min_price,
+        max_price,
+        free_shipping,
+        on_sale,
+        category,
     )
 
 
 @mcp.tool()
-def virtual_try_on_tool(
+async def virtual_try_on_tool(
     product_description: Annotated[str, "The description of the product to try on."],
     product_image_data: Annotated[
         str, "The product image as URL or base64 encoded data to try on."
@@ -172,9 +210,14 @@ def virtual_try_on_tool(
     Supports both URL and base64 encoded image data for both product and user images.
     Returns a generated image showing the virtual try-on result with HTML display.
     """
-    # Perform virtual try-on
-    result = virtual_try_on(
-        product_description, product_image_data, user_image_data, category
+    # Perform virtual try-on in a worker thread; the OpenRouter image generation
+    # and S3 upload block for seconds and would otherwise stall the event loop
+    result = await asyncio.to_thread(
+        virtual_try_on,
+        product_description,
+        product_image_data,
+        user_image_data,
+        category,
     )
 
     if result.get("success") == True:
@@ -252,4 +295,7 @@ def compare_products_tool(
 
 
 if __name__ == "__main__":
+    # Load and warm up the embedding and reranking models while the server starts
+    preload_vector_db()
+    preload_cross_encoder()
     mcp.run(transport="streamable-http")
@@ -1,17 +1,124 @@
 import os
-import requests
+import re
+import logging
+import json
+import asyncio
+import time
+import queue
+import httpx
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from operator import attrgetter, itemgetter
+from types import MappingProxyType
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
+from sentence_transformers import CrossEncoder
 from vector_database import (
-    initialize_vector_db,
-    save_product_to_db,
+    SemanticCache,
+    bulk_index,
+    embed_query,
     query_products_from_db,
 )
 
+try:
+    # orjson parses large SerpAPI/OpenRouter responses several times faster
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 load_dotenv()
 
-# Initialize vector database on module load
-initialize_vector_db()
+logger = logging.getLogger(__name__)
+
+# Shared HTTP/2 client for SerpAPI. httpx negotiates gzip (and brotli when the
+# brotli package is installed) and decodes the response transparently.
+_serpapi_client = httpx.Client(
+    http2=True,
+    timeout=httpx.Timeout(10.0, connect=3.0),
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+)
+
+# Shared keep-alive client for OpenRouter reranking calls
+_openrouter_client = httpx.Client(
+    timeout=httpx.Timeout(30.0, connect=3.0),
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=16),
+)
+
+# TTL cache of formatted SerpAPI results keyed by the canonical request params
+SERPAPI_CACHE_SIZE = 1024
+SERPAPI_CACHE_TTL_SECONDS = 300
+
+_serpapi_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_serpapi_cache_lock = threading.Lock()
+
+# Worker pool used to overlap the vector database query with the SerpAPI call
+_search_executor = ThreadPoolExecutor(
+    max_workers=8, thread_name_prefix="search-products"
+)
+
+# Reranked results of recent searches, reused for near-identical queries
+_search_results_cache = SemanticCache(threshold=0.95)
+
+# Local cross-encoder used to rerank search results, loaded on first use
+RERANKER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L6-v2"
+# INT8_RERANKER_CONFIG selects which published int8 ONNX export is loaded:
+# "avx2" (default, runs on any x86-64 host), "avx512", "avx512_vnni" or
+# "arm64", matching INT8_EMBEDDER_CONFIG
+INT8_RERANKER_CONFIG = os.getenv("INT8_RERANKER_CONFIG", "avx2")
+# avx2 kernels quantize weights to unsigned int8, the other configs to signed
+RERANKER_INT8_FILE = (
+    f"onnx/model_{'quint8' if INT8_RERANKER_CONFIG == 'avx2' else 'qint8'}"
+    f"_{INT8_RERANKER_CONFIG}.onnx"
+)
+# Pairs per cross-encoder forward pass, bounding peak memory when many
+# coalesced requests are scored together
+RERANKER_BATCH_SIZE = 64
+
+_cross_encoder = None
+_cross_encoder_lock = threading.Lock()
+_cross_encoder_loaded = False
+
+# Static SerpAPI parameters shared by every Google Shopping request
+_BASE_PARAMS = MappingProxyType(
+    {
+        "engine": "google_shopping",
+        "google_domain": "google.fr",
+        "hl": "fr",
+        "gl": "fr",
+        "location": "Paris, Ile-de-France, France",
+        "tbm": "shop",
+    }
+)
+
+# Defaults for the SerpAPI shopping result fields mapped onto products
+_SERP_FIELD_DEFAULTS = MappingProxyType(
+    {
+        "title": "",
+        "price": "",
+        "currency": "USD",
+        "thumbnail": "",
+        "link": "",
+        "source": "",
+        "rating": None,
+        "reviews": None,
+        "description": "",
+        "brand": "",
+        "delivery": "",
+        "old_price": None,
+        "tag": "",
+    }
+)
+_get_serp_fields = itemgetter(*_SERP_FIELD_DEFAULTS)
+
+# Matches free delivery mentions ("free", "gratuit(e)", "kostenlos", "gratis")
+_FREE_SHIPPING_RE = re.compile(r"\b(?:free|gratuit|kostenlos|gratis)", re.IGNORECASE)
+
+# Bounds for the number of results a single search may request
+MIN_NUM_RESULTS = 1
+MAX_NUM_RESULTS = 100
 
 
 def get_serpapi_key():
@@ -24,6 +131,16 @@ def get_openrouter_api_key():
     return os.getenv("OPENROUTER_API_KEY", "your_openrouter_api_key_here")
 
 
+def get_reranker_backend():
+    """Get the reranker backend ("cross_encoder" or "llm") from environment variable"""
+    return os.getenv("RERANKER_BACKEND", "cross_encoder")
+
+
+def _clamp_num_results(num_results: int) -> int:
+    """Clamp the requested number of results to [MIN_NUM_RESULTS, MAX_NUM_RESULTS]"""
+    return max(MIN_NUM_RESULTS, min(int(num_results), MAX_NUM_RESULTS))
+
+
 def mock_search_products():
     return [
         {
@@ -36,6 +153,107 @@ def mock_search_products():
     ]
 
 
+def _serpapi_cache_key(params: Dict[str, Any]) -> str:
+    """Build a canonical cache key from SerpAPI params (excluding the API key)"""
+    return json.dumps(
+        {key: value for key, value in params.items() if key != "api_key"},
+        sort_keys=True,
+    )
+
+
+def _get_cached_serpapi_results(cache_key: str) -> Optional[List[Dict[str, Any]]]:
+    """Get cached SerpAPI results if present and not expired"""
+    with _serpapi_cache_lock:
+        entry = _serpapi_cache.get(cache_key)
+        if entry is None:
+            return None
+
+        timestamp, products = entry
+        if time.monotonic() - timestamp > SERPAPI_CACHE_TTL_SECONDS:
+            del _serpapi_cache[cache_key]
+            return None
+
+        _serpapi_cache.move_to_end(cache_key)
+        return products
+
+
+def _cache_serpapi_results(cache_key: str, products: List[Dict[str, Any]]):
+    """Cache SerpAPI results, evicting the least recently used entries"""
+    with _serpapi_cache_lock:
+        _serpapi_cache[cache_key] = (time.monotonic(), products)
+        _serpapi_cache.move_to_end(cache_key)
+        while len(_serpapi_cache) > SERPAPI_CACHE_SIZE:
+            _serpapi_cache.popitem(last=False)
+
+
+def _postprocess_serpapi_response(
+    content: bytes, category: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Decode a raw SerpAPI response, format its shopping results and index them.
+
+    Args:
+        content: Raw JSON response body from SerpAPI
+        category: Product category attached to every formatted product
+
+    Returns:
+        List of formatted product dictionaries
+    """
+    data = json_loads(content)
+
+    # Extract shopping results
+    shopping_results = data.get("shopping_results", [])
+
+    # Format results
+    products = []
+    for item in shopping_results:
+        (
+            title,
+            price,
+            currency,
+            thumbnail,
+            link,
+            source,
+            rating,
+            reviews,
+            description,
+            brand,
+            delivery,
+            old_price,
+            tag,
+        ) = _get_serp_fields(
+            {**_SERP_FIELD_DEFAULTS, "link": item.get("product_link", ""), **item}
+        )
+        product = {
+            "title": title,
+            "price": price,
+            "currency": currency,
+            "image_url": thumbnail,
+            "source_url": link,
+            "seller": source,
+            "rating": rating,
+            "reviews_count": reviews,
+            "description": description,
+            "category": category,
+            "brand": brand,
+            "delivery": delivery,
+            "original_price": old_price,
+            "tags": [t.strip() for t in tag.split(",") if t.strip()],
+        }
+        products.append(product)
+
+    # Save all products to the vector database in one batch
+    indexed_count = bulk_index(products)
+    if indexed_count != len(products):
+        logger.warning(
+            "Only %d of %d products saved to vector database",
+            indexed_count,
+            len(products),
+        )
+
+    return products
+
+
 def search_products_serpapi(
     query: str,
     num_results: int = 10,
@@ -60,23 +278,18 @@ def search_products_serpapi(
     Returns:
         List of product dictionaries with search results
     """
+    # Skip any network or vector work for blank queries
+    if not query or not query.strip():
+        return []
+    num_results = _clamp_num_results(num_results)
+
     api_key = get_serpapi_key()
 
     if api_key == "your_serpapi_key_here":
         return mock_search_products()
 
     # Build search parameters
-    params = {
-        "api_key": api_key,
-        "engine": "google_shopping",
-        "q": query,
-        "num": num_results,
-        "google_domain": "google.fr",
-        "hl": "fr",
-        "gl": "fr",
-        "location": "Paris, Ile-de-France, France",
-        "tbm": "shop",
-    }
+    params = {**_BASE_PARAMS, "api_key": api_key, "q": query, "num": num_results}
 
     # Add optional filters
     if min_price is not None:
@@ -90,48 +303,22 @@ def search_products_serpapi(
     if category:
         params["category"] = str(category)
 
+    # Serve repeated searches with identical parameters from the cache
+    cache_key = _serpapi_cache_key(params)
+    cached_products = _get_cached_serpapi_results(cache_key)
+    if cached_products is not None:
+        return list(cached_products)
+
     try:
         # Make API request
-        response = requests.get("https://serpapi.com/search", params=params)
+        response = _serpapi_client.get("https://serpapi.com/search", params=params)
         response.raise_for_status()
 
-        data = response.json()
-
-        # Extract shopping results
-        shopping_results = data.get("shopping_results", [])
-
-        # Format results
-        products = []
-        for item in shopping_results:
-            product = {
-                "title": item.get("title", ""),
-                "price": item.get("price", ""),
-                "currency": item.get("currency", "USD"),
-                "image_url": item.get("thumbnail", ""),
-                "source_url": item.get("link", item.get("product_link", "")),
-                "seller": item.get("source", ""),
-                "rating": item.get("rating"),
-                "reviews_count": item.get("reviews"),
-                "description": item.get("description", ""),
-                "category": category,
-                "brand": item.get("brand", ""),
-                "delivery": item.get("delivery", ""),
-                "original_price": item.get("old_price"),
-                "tags": [
-                    tag.strip() for tag in item.get("tag", "").split(",") if tag.strip()
-                ],
-            }
-            products.append(product)
-
-            # Save product to vector database
-            try:
-                save_product_to_db(product)
-            except Exception as e:
-                print(f"Warning: Failed to save product to vector database: {e}")
-
+        products = _postprocess_serpapi_response(response.content, category)
+        _cache_serpapi_results(cache_key, products)
         return products
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return [{"error": f"API request failed: {str(e)}", "products": []}]
     except KeyError as e:
         return [{"error": f"Unexpected API response format: {str(e)}", "products": []}]
@@ -147,6 +334,7 @@ def search_products_from_db(
     free_shipping: Optional[bool] = None,
     on_sale: Optional[bool] = None,
     category: Optional[str] = None,
+    query_embedding: Optional[np.ndarray] = None,
 ) -> List[Dict[str, Any]]:
     """
     Search for products from the vector database using semantic search.
@@ -159,10 +347,16 @@ def search_products_from_db(
         free_shipping: Filter for free shipping (not implemented in vector search)
         on_sale: Filter for products on sale (not implemented in vector search)
         category: Product category filter
+        query_embedding: Optional precomputed embedding of the query
 
     Returns:
         List of product dictionaries with search results from vector database
     """
+    # Skip any network or vector work for blank queries
+    if not query or not query.strip():
+        return []
+    num_results = _clamp_num_results(num_results)
+
     try:
         # Convert price filters to float for vector database
         min_price_float = float(min_price) if min_price is not None else None
@@ -175,9 +369,10 @@ def search_products_from_db(
             category=category,
             min_price=min_price_float,
             max_price=max_price_float,
+            query_embedding=query_embedding,
         )
 
-        print(f"search_products_from_db: Vector results: {len(products)}")
+        logger.debug("search_products_from_db: Vector results: %d", len(products))
 
         if not products or len(products) == 0:
             return []
@@ -187,8 +382,9 @@ def search_products_from_db(
         for product in products:
             # Apply free shipping filter if specified
             if free_shipping is not None:
-                delivery = product.get("delivery", "").lower()
-                has_free_shipping = "free" in delivery or "gratuit" in delivery
+                has_free_shipping = bool(
+                    _FREE_SHIPPING_RE.search(product.get("delivery") or "")
+                )
                 if free_shipping and not has_free_shipping:
                     continue
                 if not free_shipping and has_free_shipping:
@@ -210,6 +406,191 @@ def search_products_from_db(
         return [{"error": f"Vector database search failed: {str(e)}", "products": []}]
 
 
+def _use_int8_reranker() -> bool:
+    """Check whether the int8 ONNX cross-encoder is enabled"""
+    return os.getenv("USE_INT8_RERANKER", "false").lower() in ("1", "true", "yes")
+
+
+def _load_cross_encoder() -> CrossEncoder:
+    """
+    Load the reranking cross-encoder.
+
+    When USE_INT8_RERANKER is enabled, the int8-quantized ONNX export of the
+    model is run with ONNX Runtime instead of PyTorch.
+    """
+    if _use_int8_reranker():
+        return CrossEncoder(
+            RERANKER_MODEL_NAME,
+            backend="onnx",
+            model_kwargs={"file_name": RERANKER_INT8_FILE},
+        )
+    return CrossEncoder(RERANKER_MODEL_NAME)
+
+
+def _get_cross_encoder() -> Optional[CrossEncoder]:
+    """
+    Get the reranking cross-encoder, loading it once on first use.
+
+    A failed load is not retried, so hosts that cannot reach the model hub do
+    not pay its timeout on every search.
+    """
+    global _cross_encoder, _cross_encoder_loaded
+
+    if not _cross_encoder_loaded:
+        with _cross_encoder_lock:
+            if not _cross_encoder_loaded:
+                try:
+                    _cross_encoder = _load_cross_encoder()
+                    # Pay the first-call cost before the first real rerank
+                    _cross_encoder.predict(
+                        [("warmup", "warmup")], show_progress_bar=False
+                    )
+                except Exception as e:
+                    logger.error("Error loading reranking cross-encoder: %s", e)
+                    _cross_encoder = None
+                _cross_encoder_loaded = True
+
+    return _cross_encoder
+
+
+def preload_cross_encoder():
+    """Start loading the reranking cross-encoder in a background thread"""
+    if get_reranker_backend() == "llm":
+        return
+    threading.Thread(
+        target=_get_cross_encoder, name="cross-encoder-preload", daemon=True
+    ).start()
+
+
+class RerankBatcher:
+    """
+    Coalesces concurrent cross-encoder rerank requests into one predict call.
+
+    Requests arriving within `max_delay_ms` of the first one (up to `max_batch`
+    requests) are scored together by a background worker thread, and each
+    request's future is resolved with the scores of its own pairs.
+    """
+
+    def __init__(self, max_batch: int = 32, max_delay_ms: int = 10):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def submit(self, pairs: List[tuple]) -> Future:
+        """Queue (query, text) pairs for scoring and return a future of their scores"""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((pairs, future))
+        return future
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name="rerank-batcher", daemon=True
+                    )
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+
+            # Collect requests that arrive within the batching window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            self._score(batch)
+
+    def _score(self, batch: List[tuple]):
+        all_pairs = [pair for pairs, _ in batch for pair in pairs]
+
+        try:
+            cross_encoder = _get_cross_encoder()
+            if cross_encoder is None:
+                raise RuntimeError("Reranking cross-encoder not available")
+            scores = cross_encoder.predict(
+                all_pairs, batch_size=RERANKER_BATCH_SIZE, show_progress_bar=False
+            )
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for pairs, future in batch:
+            future.set_result(scores[offset : offset + len(pairs)])
+            offset += len(pairs)
+
+
+_rerank_batcher = RerankBatcher()
+
+
+def rerank_products_with_cross_encoder(
+    products: List[Dict[str, Any]], query: str, max_products: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Rerank products locally with a cross-encoder, scoring all pairs in one predict call.
+
+    Args:
+        products: List of product dictionaries to rerank
+        query: Original search query for context
+        max_products: Maximum number of products to return
+
+    Returns:
+        List of reranked product dictionaries
+    """
+    if not products or len(products) == 0:
+        return products
+
+    if _get_cross_encoder() is None:
+        return products[:max_products]
+
+    try:
+        pairs = [
+            (
+                query,
+                " ".join(
+                    part
+                    for part in (
+                        product.get("title"),
+                        product.get("brand"),
+                        product.get("description"),
+                    )
+                    if part
+                ),
+            )
+            for product in products
+        ]
+        # Scored together with any concurrent rerank requests
+        scores = _rerank_batcher.submit(pairs).result()
+
+        ranked_indices = sorted(
+            range(len(products)), key=scores.__getitem__, reverse=True
+        )
+        final_products = [products[i] for i in ranked_indices[:max_products]]
+
+        logger.debug(
+            "Cross-encoder reranking: %d -> %d products",
+            len(products),
+            len(final_products),
+        )
+        return final_products
+
+    except Exception as e:
+        logger.error("Error in cross-encoder reranking: %s", e)
+        return products[:max_products]
+
+
 def rerank_products_with_llm(
     products: List[Dict[str, Any]], query: str, max_products: int = 10
 ) -> List[Dict[str, Any]]:
@@ -230,28 +611,23 @@ def rerank_products_with_llm(
     api_key = get_openrouter_api_key()
 
     if api_key == "your_openrouter_api_key_here":
-        print("Warning: OpenRouter API key not configured, skipping LLM reranking")
+        logger.warning("OpenRouter API key not configured, skipping LLM reranking")
         return products[:max_products]
 
     try:
-        # Prepare product data for LLM
-        product_summaries = []
-        for i, product in enumerate(products):
-            summary = {
-                "index": i,
-                "title": product.get("title", ""),
-                "price": product.get("price", ""),
-                "currency": product.get("currency", ""),
-                "rating": product.get("rating", 0),
-                "reviews_count": product.get("reviews_count", 0),
-                "description": product.get("description", ""),
-                "brand": product.get("brand", ""),
-                "seller": product.get("seller", ""),
-                "delivery": product.get("delivery", ""),
-                "original_price": product.get("original_price", ""),
-                "tags": product.get("tags", []),
+        # Prepare compact product data for the LLM: only high-signal fields,
+        # short keys and capped string lengths keep the prompt (prefill) small
+        product_summaries = [
+            {
+                "i": i,
+                "t": (product.get("title") or "")[:80],
+                "p": product.get("price", ""),
+                "r": product.get("rating"),
+                "b": product.get("brand") or "",
+                "d": (product.get("description") or "")[:120],
             }
-            product_summaries.append(summary)
+            for i, product in enumerate(products)
+        ]
 
         # Create prompt for LLM
         prompt = f"""
@@ -259,25 +635,23 @@ You are a shopping assistant that needs to rerank products based on relevance to
 
 Search Query: "{query}"
 
-Products to rank:
-{product_summaries}
+Products to rank (i: index, t: title, p: price, r: rating, b: brand, d: description):
+{json.dumps(product_summaries, ensure_ascii=False, separators=(",", ":"))}
 
 Please analyze each product and rank them from most relevant to least relevant for the search query "{query}".
 
 Consider these factors:
 1. Title relevance to the search query
 2. Price value and competitiveness
-3. Product rating and review count
+3. Product rating
 4. Brand reputation
-5. Seller reliability
-6. Delivery options
-7. Product completeness (description, images, etc.)
-8. Special offers (original price vs current price)
+5. Description relevance
 
 Return the ranked product indices in order of relevance (most relevant first).
 """
 
-        # Define the response schema for structured output
+        # Define a tight response schema for structured output: the model only
+        # emits the indices array, and strict mode makes the provider enforce it
         response_schema = {
             "type": "object",
             "properties": {
@@ -290,12 +664,9 @@ Return the ranked product indices in order of relevance (most relevant first).
                     },
                     "description": "Array of product indices in order of relevance (most relevant first)",
                 },
-                "reasoning": {
-                    "type": "string",
-                    "description": "Brief explanation of the ranking decisions",
-                },
             },
             "required": ["ranked_indices"],
+            "additionalProperties": False,
         }
 
         # Make API request to OpenRouter with structured output
@@ -310,90 +681,143 @@ Return the ranked product indices in order of relevance (most relevant first).
             "model": "google/gemini-2.5-flash-lite",
             "messages": [{"role": "user", "content": prompt}],
             "temperature": 0.1,
+            # Cap the output with room for pretty-printed JSON: up to ~8 tokens
+            # per index (newline, indent, digits, comma) plus the envelope
+            "max_tokens": 64 + 8 * len(products),
             "response_format": {
                 "type": "json_schema",
-                "json_schema": {"name": "product_ranking", "schema": response_schema},
+                "json_schema": {
+                    "name": "product_ranking",
+                    "strict": True,
+                    "schema": response_schema,
+                },
             },
+            # Only route to providers that honour response_format
+            "provider": {"require_parameters": True},
         }
 
-        response = requests.post(
+        response = _openrouter_client.post(
             "https://openrouter.ai/api/v1/chat/completions",
             headers=headers,
             json=payload,
-            timeout=30,
         )
 
         if response.status_code != 200:
-            print(f"OpenRouter API error: {response.status_code} - {response.text}")
+            logger.error(
+                "OpenRouter API error: %s - %s", response.status_code, response.text
+            )
             return products[:max_products]
 
         response.raise_for_status()
 
-        result = response.json()
+        result = json_loads(response.content)
 
         # Parse structured response
         try:
-            import json
-
             # Get the structured response content
-            response_content = result["choices"][0]["message"]["content"]
+            choice = result["choices"][0]
+            if choice.get("finish_reason") == "length":
+                logger.warning(
+                    "LLM ranking for %d products hit max_tokens and was truncated",
+                    len(products),
+                )
+            response_content = choice["message"]["content"]
 
             # Parse the JSON response (should be valid JSON due to structured output)
             if isinstance(response_content, str):
-                structured_data = json.loads(response_content)
+                structured_data = json_loads(response_content)
             else:
                 structured_data = response_content
 
             # Extract ranked indices from structured response
             ranked_indices = structured_data.get("ranked_indices", [])
-            reasoning = structured_data.get("reasoning", "No reasoning provided")
-
-            print(f"LLM reasoning: {reasoning}")
 
             # Validate indices
             if not isinstance(ranked_indices, list):
                 raise ValueError("ranked_indices is not a list")
 
-            # Validate that all indices are valid
-            valid_indices = []
-            for idx in ranked_indices:
-                if isinstance(idx, int) and 0 <= idx < len(products):
-                    valid_indices.append(idx)
-                else:
-                    print(f"Warning: Invalid index {idx}, skipping")
+            # Keep only valid indices, then append any products the model left
+            # out in their original order
+            n = len(products)
+            valid_indices = [
+                idx for idx in ranked_indices if isinstance(idx, int) and 0 <= idx < n
+            ]
+            if len(valid_indices) != len(ranked_indices):
+                logger.warning(
+                    "Skipped %d invalid indices from LLM ranking",
+                    len(ranked_indices) - len(valid_indices),
+                )
 
-            # Create reranked products using valid indices
-            reranked_products = []
-            for idx in valid_indices:
-                reranked_products.append(products[idx])
-
-            # Add any remaining products that weren't ranked
             ranked_indices_set = set(valid_indices)
-            for i, product in enumerate(products):
-                if i not in ranked_indices_set:
-                    reranked_products.append(product)
+            reranked_products = [products[idx] for idx in valid_indices] + [
+                product
+                for i, product in enumerate(products)
+                if i not in ranked_indices_set
+            ]
 
             # Limit to max_products
             final_products = reranked_products[:max_products]
 
-            print(f"LLM reranking: {len(products)} -> {len(final_products)} products")
+            logger.debug(
+                "LLM reranking: %d -> %d products", len(products), len(final_products)
+            )
             return final_products
 
         except (json.JSONDecodeError, ValueError, KeyError) as e:
-            print(f"Error parsing structured LLM response: {e}")
-            print(
-                f"Response content: {result.get('choices', [{}])[0].get('message', {}).get('content', 'No content')}"
-            )
+            logger.error("Error parsing structured LLM response: %s", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Response content: %s",
+                    result.get("choices", [{}])[0]
+                    .get("message", {})
+                    .get("content", "No content"),
+                )
             return products[:max_products]
 
-    except requests.exceptions.RequestException as e:
-        print(f"OpenRouter API request failed: {e}")
+    except httpx.HTTPError as e:
+        logger.error("OpenRouter API request failed: %s", e)
         return products[:max_products]
     except Exception as e:
-        print(f"Error in LLM reranking: {e}")
+        logger.error("Error in LLM reranking: %s", e)
         return products[:max_products]
 
 
+@dataclass(slots=True)
+class SearchHit:
+    """A deduplicated product candidate in the combined search"""
+
+    product: Dict[str, Any]
+    source: str
+    score: float
+    combined_score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the product dictionary returned by search_products"""
+        return {**self.product, "source": self.source, "score": self.score}
+
+
+def rerank_products(
+    products: List[Dict[str, Any]], query: str, max_products: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Rerank products with the configured backend.
+
+    Uses the local cross-encoder by default; set RERANKER_BACKEND=llm to rerank
+    with OpenRouter instead.
+
+    Args:
+        products: List of product dictionaries to rerank
+        query: Original search query for context
+        max_products: Maximum number of products to return
+
+    Returns:
+        List of reranked product dictionaries
+    """
+    if get_reranker_backend() == "llm":
+        return rerank_products_with_llm(products, query, max_products)
+    return rerank_products_with_cross_encoder(products, query, max_products)
+
+
 def search_products(
     query: str,
     num_results: int = 10,
@@ -420,9 +844,34 @@ def search_products(
     Returns:
         List of product dictionaries with combined search results
     """
+    # Skip any network or vector work for blank queries
+    if not query or not query.strip():
+        return []
+    num_results = _clamp_num_results(num_results)
+
     try:
-        # Search from both sources
-        vector_results = search_products_from_db(
+        # Embed the query once; the embedding is shared by the semantic cache
+        # and the vector database search
+        query_embedding = embed_query(query)
+        filters_key = (
+            num_results,
+            min_price,
+            max_price,
+            free_shipping,
+            on_sale,
+            category,
+            vector_db_weight,
+        )
+        if query_embedding is not None:
+            cached_results = _search_results_cache.get(query_embedding, filters_key)
+            if cached_results is not None:
+                logger.debug("Semantic cache hit for query: %s", query)
+                return list(cached_results)
+
+        # Search from both sources concurrently: the vector query runs in the
+        # shared pool while SerpAPI is called from the current thread
+        vector_future = _search_executor.submit(
+            search_products_from_db,
             query,
             num_results * 2,
             min_price,
@@ -430,6 +879,7 @@ def search_products(
             free_shipping,
             on_sale,
             category,
+            query_embedding,
         )
         internet_results = search_products_serpapi(
             query,
@@ -440,8 +890,9 @@ def search_products(
             on_sale,
             category,
         )
+        vector_results = vector_future.result()
 
-        print(f"Vector results: {len(vector_results)}")
+        logger.debug("Vector results: %d", len(vector_results))
 
         if not vector_results or len(vector_results) == 0:
             return internet_results
@@ -449,59 +900,132 @@ def search_products(
         if not internet_results or len(internet_results) == 0:
             return vector_results
 
-        # Remove error responses
+        # Remove error responses, remembering whether either source failed
+        degraded = any(r.get("error") for r in vector_results) or any(
+            r.get("error") for r in internet_results
+        )
         vector_results = [r for r in vector_results if not r.get("error")]
         internet_results = [r for r in internet_results if not r.get("error")]
 
-        # Deduplicate results based on source_url
-        seen_urls = set()
-        combined_results = []
+        # Weighted score terms (vector DB results get higher weight)
+        internet_weight = 1 - vector_db_weight
+        vector_db_offset = internet_weight * 0.5
+        internet_offset = vector_db_weight * 0.3
 
-        # Add vector database results first (they have semantic scores)
+        # Deduplicate results based on source_url, keeping vector database
+        # results first (they have semantic scores). Products are wrapped rather
+        # than copied or mutated, and each combined score is computed once.
+        hits: Dict[str, SearchHit] = {}
         for product in vector_results:
-            source_url = product.get("source_url", "")
-            if source_url and source_url not in seen_urls:
-                product["source"] = "vector_db"
-                combined_results.append(product)
-                seen_urls.add(source_url)
-
-        # Add internet results that aren't duplicates
+            source_url = product.get("source_url")
+            if source_url and source_url not in hits:
+                score = product.get("score", 0.5)
+                hits[source_url] = SearchHit(
+                    product,
+                    "vector_db",
+                    score,
+                    score * vector_db_weight + vector_db_offset,
+                )
+
+        # Add internet results that aren't duplicates, with a default score
         for product in internet_results:
-            source_url = product.get("source_url", "")
-            if source_url and source_url not in seen_urls:
-                product["source"] = "internet"
-                # Add a default score for internet results
-                if "score" not in product:
-                    product["score"] = 0.5
-                combined_results.append(product)
-                seen_urls.add(source_url)
-
-        # Sort by combined score (vector DB results get higher weight)
-        def combined_score(product):
-            base_score = product.get("score", 0.5)
-            source = product.get("source", "internet")
-
-            if source == "vector_db":
-                return base_score * vector_db_weight + (1 - vector_db_weight) * 0.5
-            else:
-                return base_score * (1 - vector_db_weight) + vector_db_weight * 0.3
-
-        combined_results.sort(key=combined_score, reverse=True)
-
-        # Apply LLM reranking to improve relevance
-        print(f"Applying LLM reranking to {len(combined_results)} products...")
-        reranked_results = rerank_products_with_llm(
-            combined_results, query, num_results
+            source_url = product.get("source_url")
+            if source_url and source_url not in hits:
+                score = product.get("score", 0.5)
+                hits[source_url] = SearchHit(
+                    product,
+                    "internet",
+                    score,
+                    score * internet_weight + internet_offset,
+                )
+
+        # Sort by combined score
+        combined_hits = sorted(
+            hits.values(), key=attrgetter("combined_score"), reverse=True
         )
 
-        print(
-            f"Combined search: {len(vector_results)} vector + {len(internet_results)} internet = {len(combined_results)} unique results -> {len(reranked_results)} after LLM reranking"
+        # Apply reranking to improve relevance, unless the merged list already
+        # fits in the requested results (reranking would only reorder a handful
+        # of products, so the score order is good enough)
+        if len(combined_hits) <= max(3, num_results):
+            logger.debug("Skipping reranking for %d products", len(combined_hits))
+            reranked_hits = combined_hits[:num_results]
+        else:
+            logger.debug("Applying reranking to %d products...", len(combined_hits))
+            hits_by_product = {id(hit.product): hit for hit in combined_hits}
+            reranked_hits = [
+                hits_by_product[id(product)]
+                for product in rerank_products(
+                    [hit.product for hit in combined_hits], query, num_results
+                )
+            ]
+
+        # Only the returned products are materialized as dicts
+        reranked_results = [hit.to_dict() for hit in reranked_hits]
+
+        logger.debug(
+            "Combined search: %d vector + %d internet = %d unique results -> %d after reranking",
+            len(vector_results),
+            len(internet_results),
+            len(combined_hits),
+            len(reranked_results),
         )
-        return reranked_results
+
+        # Don't cache results from a failed source, so a retry after a brief
+        # outage queries both sources again
+        if query_embedding is not None and reranked_results and not degraded:
+            _search_results_cache.set(query_embedding, filters_key, reranked_results)
+        return list(reranked_results)
 
     except Exception as e:
-        print(f"Error in combined search: {e}")
+        logger.error("Error in combined search: %s", e)
         # Fallback to internet search only
         return search_products_serpapi(
             query, num_results, min_price, max_price, free_shipping, on_sale, category
         )
+
+
+async def multi_search(
+    queries: List[str],
+    num_results: int = 10,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    free_shipping: Optional[bool] = None,
+    on_sale: Optional[bool] = None,
+    category: Optional[str] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Run search_products for several queries concurrently.
+
+    Each query runs in its own worker thread so comparing N candidate products
+    costs one round-trip instead of N sequential ones.
+
+    Args:
+        queries: List of search query strings
+        num_results: Number of results to return per query (default: 10)
+        min_price: Minimum price filter
+        max_price: Maximum price filter
+        free_shipping: Filter for free shipping
+        on_sale: Filter for products on sale
+        category: Product category filter
+
+    Returns:
+        List of product lists, in the same order as queries
+    """
+    tasks = []
+    for query in queries:
+        tasks.append(
+            asyncio.ensure_future(
+                asyncio.to_thread(
+                    search_products,
+                    query,
+                    num_results,
+                    min_price,
+                    max_price,
+                    free_shipping,
+                    on_sale,
+                    category,
+                )
+            )
+        )
+    return await asyncio.gather(*tasks)
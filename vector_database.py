@@ -1,27 +1,166 @@
 import os
+import re
+import logging
+import time
 import uuid
-from typing import List, Dict, Any, Optional
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+import torch
+from typing import List, Dict, Any, Optional, Hashable, Tuple
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
     Distance,
+    HnswConfigDiff,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
     VectorParams,
-    PointStruct,
     Filter,
     FieldCondition,
     MatchValue,
+    PayloadSchemaType,
+    PayloadSelectorExclude,
+    Range,
 )
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 vector_db = None
 embedding_model = None
 
+# Guards the one-time lazy initialization of vector_db and embedding_model
+_init_lock = threading.Lock()
+_initialized = False
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# HNSW graph settings for the products collection
+HNSW_M = 32
+HNSW_EF_CONSTRUCT = 128
+HNSW_EF_SEARCH = 64
+
+# Candidates fetched per result from the int8 index before rescoring
+QUANTIZATION_OVERSAMPLING = 2.0
+
+# int8-quantized ONNX Runtime embedder, exported once and cached on disk.
+# INT8_EMBEDDER_CONFIG selects the target CPU kernels: "avx2" (default, runs on
+# any x86-64 host), "avx512", "avx512_vnni" or "arm64". The signed-weight
+# configs can saturate on hosts without the matching instructions.
+INT8_EMBEDDER_DIR = os.getenv("INT8_EMBEDDER_DIR", "models/all-MiniLM-L6-v2-int8")
+INT8_EMBEDDER_CONFIG = os.getenv("INT8_EMBEDDER_CONFIG", "avx2")
+# avx2 kernels quantize weights to unsigned int8, the other configs to signed
+INT8_EMBEDDER_FILE = (
+    f"onnx/model_{'quint8' if INT8_EMBEDDER_CONFIG == 'avx2' else 'qint8'}"
+    f"_{INT8_EMBEDDER_CONFIG}.onnx"
+)
+
+# Number of texts per embedding model forward pass
+EMBEDDING_BATCH_SIZE = 64
+
+
+def _embedding_num_threads() -> int:
+    """Read EMBEDDING_NUM_THREADS, falling back to all CPUs on a bad value"""
+    default = os.cpu_count() or 1
+    value = os.getenv("EMBEDDING_NUM_THREADS")
+    if not value:
+        return default
+    try:
+        num_threads = int(value)
+    except ValueError:
+        num_threads = 0
+    if num_threads < 1:
+        logger.warning(
+            "Invalid EMBEDDING_NUM_THREADS %r, using %d threads", value, default
+        )
+        return default
+    return num_threads
+
+
+# Intra-op threads for PyTorch embedding inference (default: all CPUs)
+EMBEDDING_NUM_THREADS = _embedding_num_threads()
+
+# LRU cache of embeddings keyed by a hash of the embedded text
+EMBEDDING_CACHE_SIZE = 100_000
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".embedding_cache.npz")
+
+# Identifies the loaded embedding model and backend (PyTorch or the int8 ONNX
+# file), set once the model is loaded. Embeddings from different models or
+# backends must never share a cache entry.
+_embedding_model_tag = f"{EMBEDDING_MODEL_NAME}:torch"
+_embedding_cache_namespace = b""
+
+_embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+
+def _use_int8_embedder() -> bool:
+    """Check whether the int8 ONNX embedder is enabled"""
+    return os.getenv("USE_INT8_EMBEDDER", "false").lower() in ("1", "true", "yes")
+
+
+def _load_embedding_model() -> Tuple[SentenceTransformer, str]:
+    """
+    Load the sentence embedding model and a tag identifying its backend.
+
+    When USE_INT8_EMBEDDER is enabled, the model is exported to ONNX and
+    dynamically quantized to int8 on first use, then loaded with the ONNX
+    Runtime backend. Falls back to the PyTorch model if the ONNX extras
+    (sentence-transformers[onnx]) are not installed or the export fails.
+    """
+    torch_tag = f"{EMBEDDING_MODEL_NAME}:torch"
+    if not _use_int8_embedder():
+        return SentenceTransformer(EMBEDDING_MODEL_NAME), torch_tag
+
+    try:
+        if not os.path.exists(os.path.join(INT8_EMBEDDER_DIR, INT8_EMBEDDER_FILE)):
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+
+            onnx_model = SentenceTransformer(EMBEDDING_MODEL_NAME, backend="onnx")
+            onnx_model.save(INT8_EMBEDDER_DIR)
+            export_dynamic_quantized_onnx_model(
+                onnx_model, INT8_EMBEDDER_CONFIG, INT8_EMBEDDER_DIR
+            )
+            logger.info("Exported int8 embedding model to %s", INT8_EMBEDDER_DIR)
+
+        model = SentenceTransformer(
+            INT8_EMBEDDER_DIR,
+            backend="onnx",
+            model_kwargs={"file_name": INT8_EMBEDDER_FILE},
+        )
+        return model, f"{EMBEDDING_MODEL_NAME}:onnx:{INT8_EMBEDDER_FILE}"
+    except Exception as e:
+        logger.warning("int8 embedding model unavailable, using PyTorch model: %s", e)
+        return SentenceTransformer(EMBEDDING_MODEL_NAME), torch_tag
+
+
+def _warm_up_embedding_model(model: SentenceTransformer):
+    """
+    Run throwaway encodes so kernel selection, workspace allocation and (for
+    ONNX Runtime) graph optimization happen before the first real query.
+    """
+    for _ in range(2):
+        model.encode(
+            ["warmup"],
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+
 
 def initialize_vector_db():
     """Initialize Qdrant and embedding model"""
-    global vector_db, embedding_model
+    global vector_db, embedding_model, _embedding_model_tag, _embedding_cache_namespace
 
     try:
         # Get Qdrant URL from environment variable
@@ -37,93 +176,551 @@ def initialize_vector_db():
             vector_db.create_collection(
                 collection_name="products",
                 vectors_config=VectorParams(
-                    size=384,
-                    distance=Distance.COSINE,  # all-MiniLM-L6-v2 embedding size
+                    size=384,  # all-MiniLM-L6-v2 embedding size
+                    # Embeddings are L2-normalized at encode time, so the dot
+                    # product ranks exactly like cosine without renormalizing
+                    distance=Distance.DOT,
+                    # Original vectors are only read for rescoring
+                    on_disk=True,
+                ),
+                hnsw_config=HnswConfigDiff(m=HNSW_M, ef_construct=HNSW_EF_CONSTRUCT),
+                # Keep an int8 copy of each vector in RAM for 4x smaller, faster scans
+                quantization_config=ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(
+                        type=ScalarType.INT8, quantile=0.99, always_ram=True
+                    )
                 ),
             )
         except Exception:
             # Collection might already exist, that's okay
             pass
 
-        # Initialize embedding model
-        embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+        # Index the numeric price so price ranges are filtered inside the search
+        try:
+            vector_db.create_payload_index(
+                collection_name="products",
+                field_name="price_num",
+                field_schema=PayloadSchemaType.FLOAT,
+            )
+        except Exception:
+            # Index might already exist, that's okay
+            pass
+
+        # Initialize embedding model and pay its first-call cost up front
+        torch.set_num_threads(EMBEDDING_NUM_THREADS)
+        embedding_model, _embedding_model_tag = _load_embedding_model()
+        _embedding_cache_namespace = hashlib.blake2b(
+            _embedding_model_tag.encode(), digest_size=16
+        ).digest()
+        _warm_up_embedding_model(embedding_model)
 
-        print("Vector database and embedding model initialized successfully")
+        # Warm the embedding cache from the previous run of the same model
+        _load_embedding_cache()
+
+        logger.info("Vector database and embedding model initialized successfully")
     except Exception as e:
-        print(f"Error initializing vector database: {e}")
+        logger.error("Error initializing vector database: %s", e)
         vector_db = None
         embedding_model = None
 
 
-def save_product_to_db(product: Dict[str, Any]) -> bool:
+def _ensure_initialized() -> bool:
     """
-    Save a product to the vector database with its embedding.
+    Initialize Qdrant and the embedding model on first use.
+
+    Concurrent first calls load the model only once; a failed initialization
+    is not retried.
+
+    Returns:
+        bool: True if the vector database and embedding model are available
+    """
+    global _initialized
+
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                initialize_vector_db()
+                _initialized = True
+
+    return vector_db is not None and embedding_model is not None
+
+
+def preload_vector_db():
+    """Start initializing Qdrant and the embedding model in a background thread"""
+    threading.Thread(
+        target=_ensure_initialized, name="vector-db-preload", daemon=True
+    ).start()
+
+
+def _embedding_cache_key(text: str) -> bytes:
+    """Get the embedding cache key for a text, namespaced by the model and backend"""
+    return hashlib.blake2b(
+        text.encode(), digest_size=16, person=_embedding_cache_namespace
+    ).digest()
+
+
+def _load_embedding_cache():
+    """Load persisted embeddings into the in-memory cache"""
+    if not EMBEDDING_CACHE_PATH or not os.path.exists(EMBEDDING_CACHE_PATH):
+        return
+
+    try:
+        with np.load(EMBEDDING_CACHE_PATH) as data:
+            # Skip embeddings persisted by a different model or backend
+            if "namespace" not in data or (
+                data["namespace"].tobytes() != _embedding_cache_namespace
+            ):
+                logger.info("Ignoring embedding cache from a different model")
+                return
+            keys = data["keys"][-EMBEDDING_CACHE_SIZE:]
+            vectors = data["vectors"][-EMBEDDING_CACHE_SIZE:]
+
+        with _embedding_cache_lock:
+            for key, vector in zip(keys, vectors):
+                _embedding_cache[key.tobytes()] = vector
+
+        logger.info(
+            "Loaded %d cached embeddings from %s", len(keys), EMBEDDING_CACHE_PATH
+        )
+    except Exception as e:
+        logger.error("Error loading embedding cache: %s", e)
+
+
+def _save_embedding_cache():
+    """Persist the in-memory embedding cache for warm starts"""
+    if not EMBEDDING_CACHE_PATH or not _embedding_cache:
+        return
+
+    try:
+        with _embedding_cache_lock:
+            # Raw uint8 rows: an "S16" array would strip trailing NUL bytes
+            keys = np.frombuffer(b"".join(_embedding_cache.keys()), np.uint8).reshape(
+                -1, 16
+            )
+            vectors = np.stack(list(_embedding_cache.values()))
+
+        with open(EMBEDDING_CACHE_PATH, "wb") as f:
+            np.savez(
+                f,
+                namespace=np.frombuffer(_embedding_cache_namespace, dtype=np.uint8),
+                keys=keys,
+                vectors=vectors,
+            )
+    except Exception as e:
+        logger.error("Error saving embedding cache: %s", e)
+
+
+atexit.register(_save_embedding_cache)
+
+
+def batch_embed(texts: List[str]) -> np.ndarray:
+    """
+    Embed texts, only running the embedding model on texts not seen before.
 
     Args:
-        product: Product dictionary containing product information
+        texts: List of texts to embed
 
     Returns:
-        bool: True if successful, False otherwise
+        np.ndarray: float32 array of shape (len(texts), embedding size)
+    """
+    keys = [_embedding_cache_key(text) for text in texts]
+    vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+    missing: Dict[bytes, List[int]] = {}
+
+    with _embedding_cache_lock:
+        for i, key in enumerate(keys):
+            vector = _embedding_cache.get(key)
+            if vector is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                _embedding_cache.move_to_end(key)
+                vectors[i] = vector
+
+    if missing:
+        # Encode each distinct missing text once, in fixed-size batches of
+        # L2-normalized vectors (encode sorts by length to minimize padding)
+        indices = list(missing.values())
+        encoded = np.asarray(
+            embedding_model.encode(
+                [texts[idx[0]] for idx in indices],
+                batch_size=EMBEDDING_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            ),
+            dtype=np.float32,
+        )
+
+        with _embedding_cache_lock:
+            for key, idx, vector in zip(missing, indices, encoded):
+                for i in idx:
+                    vectors[i] = vector
+                _embedding_cache[key] = vector
+            while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+                _embedding_cache.popitem(last=False)
+
+    return np.stack(vectors)
+
+
+def cosine_similarity_batch(queries: np.ndarray, docs: np.ndarray) -> np.ndarray:
+    """
+    Score L2-normalized query vectors against L2-normalized document vectors.
+
+    Used for in-process similarity checks that don't need a Qdrant round-trip.
+
+    Args:
+        queries: Array of shape (Q, dim) or (dim,)
+        docs: Array of shape (D, dim) or (dim,)
+
+    Returns:
+        np.ndarray: float32 cosine similarities of shape (Q, D)
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    docs = np.atleast_2d(np.asarray(docs, dtype=np.float32))
+    return queries @ docs.T
+
+
+def embed_query(query: str) -> Optional[np.ndarray]:
+    """
+    Embed a search query.
+
+    Args:
+        query: Search query string
+
+    Returns:
+        L2-normalized float32 query embedding, or None if the model is not loaded
+    """
+    if not _ensure_initialized():
+        return None
+
+    embedding = batch_embed([query])[0]
+    norm = np.linalg.norm(embedding)
+    return embedding / norm if norm else embedding
+
+
+class SemanticCache:
+    """
+    In-process cache of results keyed by query embedding similarity.
+
+    A lookup hits when a cached query with the same filters key has a cosine
+    similarity of at least `threshold` with the new query. Entries expire after
+    `ttl_seconds` and the least recently used entry is evicted past `max_size`.
+    """
+
+    def __init__(
+        self, threshold: float = 0.95, max_size: int = 1024, ttl_seconds: int = 3600
+    ):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # entry id -> (query embedding, filters key, value, timestamp)
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now: float):
+        expired = [
+            entry_id
+            for entry_id, (_, _, _, timestamp) in self._entries.items()
+            if now - timestamp > self.ttl_seconds
+        ]
+        for entry_id in expired:
+            del self._entries[entry_id]
+
+    def get(self, query_embedding: np.ndarray, filters_key: Hashable) -> Any:
+        """Return the cached value for a similar query, or None on a miss"""
+        with self._lock:
+            self._evict_expired(time.monotonic())
+
+            candidates = [
+                (entry_id, embedding)
+                for entry_id, (embedding, key, _, _) in self._entries.items()
+                if key == filters_key
+            ]
+            if not candidates:
+                return None
+
+            scores = cosine_similarity_batch(
+                query_embedding, np.stack([embedding for _, embedding in candidates])
+            )[0]
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+
+            entry_id = candidates[best][0]
+            self._entries.move_to_end(entry_id)
+            return self._entries[entry_id][2]
+
+    def set(self, query_embedding: np.ndarray, filters_key: Hashable, value: Any):
+        """Cache a value for a query embedding and filters key"""
+        with self._lock:
+            self._entries[self._next_id] = (
+                np.asarray(query_embedding, dtype=np.float32),
+                filters_key,
+                value,
+                time.monotonic(),
+            )
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+# Products embedded per chunk when indexing; each chunk is uploaded to Qdrant
+# while the next one is being embedded
+INDEX_CHUNK_SIZE = 128
+
+_upload_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="qdrant-upload")
+
+# Product fields concatenated (in order, before tags) into the embedded text
+_TEXT_FIELDS = ("title", "description", "brand", "category")
+
+# Characters kept when parsing a display price
+_PRICE_CHARS_RE = re.compile(r"[^\d.,]")
+
+# Cache of vector search results for near-identical queries; cheap searches
+# (small limit and fast) are not cached
+QUERY_CACHE_THRESHOLD = 0.97
+QUERY_CACHE_MIN_LIMIT = 20
+QUERY_CACHE_MIN_SECONDS = 0.05
+# Short TTL so newly indexed products show up in results soon
+QUERY_CACHE_TTL_SECONDS = 300
+
+_query_results_cache = SemanticCache(
+    threshold=QUERY_CACHE_THRESHOLD, ttl_seconds=QUERY_CACHE_TTL_SECONDS
+)
+
+
+def parse_price(price: Any) -> Optional[float]:
+    """
+    Parse a display price such as "$1,299.99" or "1.299,99 €" into a float.
+
+    Args:
+        price: Price as a number or formatted string
+
+    Returns:
+        The numeric price, or None if it cannot be parsed
+    """
+    if isinstance(price, (int, float)):
+        return float(price)
+    if not price:
+        return None
+
+    digits = _PRICE_CHARS_RE.sub("", str(price))
+    # The last separator is the decimal point if two or fewer digits follow it
+    last_sep = max(digits.rfind("."), digits.rfind(","))
+    if last_sep != -1 and len(digits) - last_sep - 1 <= 2:
+        digits = (
+            digits[:last_sep].replace(".", "").replace(",", "")
+            + "."
+            + digits[last_sep + 1 :]
+        )
+    else:
+        digits = digits.replace(".", "").replace(",", "")
+
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+def _build_text_for_embedding(product: Dict[str, Any]) -> str:
+    """Create the text representation of a product used for its embedding"""
+    text_parts = [product[field] for field in _TEXT_FIELDS if product.get(field)]
+    text_parts.extend(product.get("tags") or ())
+
+    return " ".join(text_parts)
+
+
+# Payload fields only used for filtering and index bookkeeping; Qdrant leaves
+# them out of the product dicts returned to callers
+_INTERNAL_PAYLOAD_FIELDS = ["price_num", "embedding_model"]
+_PRODUCT_PAYLOAD = PayloadSelectorExclude(exclude=_INTERNAL_PAYLOAD_FIELDS)
+
+
+def _build_payload(product: Dict[str, Any], text_for_embedding: str) -> Dict[str, Any]:
+    """Prepare the Qdrant payload (all product data) for a product"""
+    return {
+        "title": product.get("title", ""),
+        "price": product.get("price", ""),
+        "price_num": parse_price(product.get("price")),
+        "currency": product.get("currency", "USD"),
+        "image_url": product.get("image_url", ""),
+        "source_url": product.get("source_url", ""),
+        "seller": product.get("seller", ""),
+        "rating": product.get("rating"),
+        "reviews_count": product.get("reviews_count"),
+        "description": product.get("description", ""),
+        "category": product.get("category", ""),
+        "brand": product.get("brand", ""),
+        "delivery": product.get("delivery", ""),
+        "original_price": product.get("original_price"),
+        "tags": product.get("tags", []),
+        "in_stock": product.get("in_stock", True),
+        "text_for_embedding": text_for_embedding,
+        # Model and backend that produced the stored vector
+        "embedding_model": _embedding_model_tag,
+    }
+
+
+def _point_id(product: Dict[str, Any]) -> str:
+    """Get a stable Qdrant point ID for a product, derived from its source URL"""
+    source_url = product.get("source_url")
+    if not source_url:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, source_url))
+
+
+def _get_stored_vectors(ids: List[str], texts: List[str]) -> Dict[int, np.ndarray]:
+    """
+    Fetch stored vectors of products whose embedded text has not changed and
+    that were embedded by the currently loaded model and backend.
+
+    Only texts missing from the embedding cache are looked up in Qdrant.
+
+    Args:
+        ids: Point IDs of the products being indexed
+        texts: Embedded text of each product
+
+    Returns:
+        Dict mapping product positions to their stored float32 vectors
+    """
+    with _embedding_cache_lock:
+        candidates = [
+            i
+            for i, text in enumerate(texts)
+            if _embedding_cache_key(text) not in _embedding_cache
+        ]
+    if not candidates:
+        return {}
+
+    try:
+        points = vector_db.retrieve(
+            collection_name="products",
+            ids=list({ids[i] for i in candidates}),
+            with_payload=["text_for_embedding", "embedding_model"],
+            with_vectors=True,
+        )
+    except Exception as e:
+        logger.warning("Error retrieving stored product vectors: %s", e)
+        return {}
+
+    # Vectors from another model or backend live in a different embedding
+    # space, so those products are re-embedded
+    stored = {
+        str(point.id): (point.payload.get("text_for_embedding"), point.vector)
+        for point in points
+        if point.payload.get("embedding_model") == _embedding_model_tag
+    }
+    vectors = {}
+    for i in candidates:
+        text, vector = stored.get(ids[i], (None, None))
+        if vector is not None and text == texts[i]:
+            vectors[i] = np.asarray(vector, dtype=np.float32)
+    return vectors
+
+
+def _prepare_index_batch(
+    products: List[Dict[str, Any]],
+) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+    """Build the point IDs, vectors and payloads for a batch of products"""
+    texts = [_build_text_for_embedding(product) for product in products]
+    payloads = [_build_payload(product, text) for product, text in zip(products, texts)]
+
+    # Point IDs derive from the product URL, so re-indexing a product
+    # overwrites its point instead of adding a duplicate
+    ids = [_point_id(product) for product in products]
+
+    # Reuse stored vectors for unchanged products, then generate the rest
+    # of the embeddings in one batch, reusing cached ones
+    stored = _get_stored_vectors(ids, texts)
+    vectors: List[Optional[np.ndarray]] = [stored.get(i) for i in range(len(texts))]
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        encoded = batch_embed([texts[i] for i in missing])
+        for i, vector in zip(missing, encoded):
+            vectors[i] = vector
+
+    return ids, np.stack(vectors), payloads
+
+
+def _upload_index_batch(
+    ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]
+):
+    """Upsert a prepared batch of products into the vector database"""
+    vector_db.upload_collection(
+        collection_name="products",
+        vectors=vectors,
+        payload=payloads,
+        ids=ids,
+        batch_size=256,
+        # Return only once Qdrant has applied the points, like upsert did
+        wait=True,
+    )
+
+
+def bulk_index(products: List[Dict[str, Any]]) -> int:
+    """
+    Embed and upsert a batch of products into the vector database.
+
+    All inserts go through this function so that embeddings are computed in
+    batched forward passes and uploaded as contiguous float32 arrays. Large
+    batches are split into chunks of INDEX_CHUNK_SIZE products, and each chunk
+    is uploaded in the background while the next one is being embedded.
+
+    Args:
+        products: List of product dictionaries to index
+
+    Returns:
+        int: Number of products whose chunk Qdrant confirmed (fewer than
+        len(products) if a chunk failed)
     """
     global vector_db, embedding_model
 
-    if not vector_db or not embedding_model:
-        return False
+    if not products or not _ensure_initialized():
+        return 0
 
+    indexed = 0
+    upload: Optional[Future] = None
+    upload_size = 0
     try:
-        # Create text representation for embedding
-        text_parts = []
-        if product.get("title"):
-            text_parts.append(product["title"])
-        if product.get("description"):
-            text_parts.append(product["description"])
-        if product.get("brand"):
-            text_parts.append(product["brand"])
-        if product.get("category"):
-            text_parts.append(product["category"])
-        if product.get("tags"):
-            text_parts.extend(product["tags"])
-
-        text_for_embedding = " ".join(text_parts)
-
-        # Generate embedding
-        embedding = embedding_model.encode(text_for_embedding).tolist()
-
-        # Create point ID (use source_url as unique identifier or generate UUID)
-        point_id = str(uuid.uuid4())
-
-        # Prepare payload (all product data)
-        payload = {
-            "title": product.get("title", ""),
-            "price": product.get("price", ""),
-            "currency": product.get("currency", "USD"),
-            "image_url": product.get("image_url", ""),
-            "source_url": product.get("source_url", ""),
-            "seller": product.get("seller", ""),
-            "rating": product.get("rating"),
-            "reviews_count": product.get("reviews_count"),
-            "description": product.get("description", ""),
-            "category": product.get("category", ""),
-            "brand": product.get("brand", ""),
-            "delivery": product.get("delivery", ""),
-            "original_price": product.get("original_price"),
-            "tags": product.get("tags", []),
-            "in_stock": product.get("in_stock", True),
-            "text_for_embedding": text_for_embedding,
-        }
-
-        # Create point
-        point = PointStruct(id=point_id, vector=embedding, payload=payload)
-
-        # Insert point
-        vector_db.upsert(collection_name="products", points=[point])
-
-        print(f"Product saved to vector database: {product.get('title', 'Unknown')}")
-        return True
+        for start in range(0, len(products), INDEX_CHUNK_SIZE):
+            chunk = products[start : start + INDEX_CHUNK_SIZE]
+            batch = _prepare_index_batch(chunk)
+            if upload is not None:
+                upload.result()
+                indexed += upload_size
+            upload = _upload_executor.submit(_upload_index_batch, *batch)
+            upload_size = len(chunk)
+        upload.result()
+        indexed += upload_size
+
+        logger.debug("Indexed %d products into vector database", indexed)
+        return indexed
 
     except Exception as e:
-        print(f"Error saving product to vector database: {e}")
-        return False
+        logger.error("Error indexing products into vector database: %s", e)
+
+        # Don't leave an upload running; count its chunk if it lands
+        if upload is not None:
+            try:
+                upload.result()
+                indexed += upload_size
+            except Exception:
+                pass
+        return indexed
+
+
+def save_product_to_db(product: Dict[str, Any]) -> bool:
+    """
+    Save a product to the vector database with its embedding.
+
+    Args:
+        product: Product dictionary containing product information
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    return bulk_index([product]) == 1
 
 
 def query_products_from_db(
@@ -132,6 +729,7 @@ def query_products_from_db(
     category: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
+    query_embedding: Optional[np.ndarray] = None,
 ) -> List[Dict[str, Any]]:
     """
     Query products from vector database using semantic search.
@@ -142,19 +740,32 @@ def query_products_from_db(
         category: Optional category filter
         min_price: Optional minimum price filter
         max_price: Optional maximum price filter
+        query_embedding: Optional precomputed embedding of the query
 
     Returns:
         List of product dictionaries matching the query
     """
     global vector_db, embedding_model
 
-    if not vector_db or not embedding_model:
-        print("Querying vector database failed: Vector database not initialized")
+    if not _ensure_initialized():
+        logger.warning(
+            "Querying vector database failed: Vector database not initialized"
+        )
         return []
 
     try:
-        # Generate embedding for query
-        query_embedding = embedding_model.encode(query).tolist()
+        # Generate embedding for query unless the caller already has one
+        if query_embedding is None:
+            query_embedding = embed_query(query)
+
+        # Near-duplicate queries with the same filters share cached results
+        filters_key = (limit, category, min_price, max_price)
+        cached = _query_results_cache.get(query_embedding, filters_key)
+        if cached is not None:
+            logger.debug("Query results cache hit for query: %s", query)
+            return list(cached)
+
+        start = time.perf_counter()
 
         # Build filter conditions
         filter_conditions = []
@@ -165,17 +776,26 @@ def query_products_from_db(
             )
 
         if min_price is not None or max_price is not None:
-            # Note: Price filtering would need to be implemented differently
-            # as Qdrant doesn't have built-in numeric range filtering
-            # For now, we'll do the filtering after retrieval
-            pass
+            filter_conditions.append(
+                FieldCondition(
+                    key="price_num", range=Range(gte=min_price, lte=max_price)
+                )
+            )
 
         # Perform vector search
         search_result = vector_db.search(
             collection_name="products",
-            query_vector=query_embedding,
-            limit=limit * 2,  # Get more results to account for filtering
+            query_vector=np.asarray(query_embedding).tolist(),
+            limit=limit,
             query_filter=Filter(must=filter_conditions) if filter_conditions else None,
+            with_payload=_PRODUCT_PAYLOAD,
+            search_params=SearchParams(
+                hnsw_ef=HNSW_EF_SEARCH,
+                # Oversample on the int8 vectors, then rescore with the originals
+                quantization=QuantizationSearchParams(
+                    rescore=True, oversampling=QUANTIZATION_OVERSAMPLING
+                ),
+            ),
         )
 
         # Convert results to product format
@@ -183,67 +803,57 @@ def query_products_from_db(
         for result in search_result:
             product = result.payload.copy()
             product["score"] = result.score  # Add similarity score
-
-            # Apply price filtering if needed
-            if min_price is not None or max_price is not None:
-                try:
-                    price_str = (
-                        product.get("price", "").replace("$", "").replace(",", "")
-                    )
-                    price = float(price_str) if price_str else 0
-
-                    if min_price is not None and price < min_price:
-                        continue
-                    if max_price is not None and price > max_price:
-                        continue
-                except (ValueError, TypeError):
-                    # If price parsing fails, include the product
-                    pass
-
             products.append(product)
 
-        # Limit results
-        products = products[:limit]
+        # Only cache searches that were expensive enough to be worth it
+        if (
+            limit >= QUERY_CACHE_MIN_LIMIT
+            or time.perf_counter() - start >= QUERY_CACHE_MIN_SECONDS
+        ):
+            _query_results_cache.set(query_embedding, filters_key, products)
 
-        print(f"Found {len(products)} products for query: {query}")
+        logger.debug("Found %d products for query: %s", len(products), query)
         return products
 
     except Exception as e:
-        print(f"Error querying products from vector database: {e}")
+        logger.error("Error querying products from vector database: %s", e)
         return []
 
 
-def get_all_products_from_db(limit: int = 100) -> List[Dict[str, Any]]:
+def get_all_products_from_db(
+    limit: int = 100, fields: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
     """
     Get all products from the vector database.
 
     Args:
         limit: Maximum number of products to return
+        fields: Optional payload fields to return (default: all product fields)
 
     Returns:
         List of all product dictionaries
     """
     global vector_db
 
-    if not vector_db:
-        print("Vector database not initialized")
+    if not _ensure_initialized():
+        logger.warning("Vector database not initialized")
         return []
 
     try:
-        # Get all points from collection
-        points = vector_db.scroll(collection_name="products", limit=limit)[
-            0
-        ]  # scroll returns (points, next_page_offset)
+        # Get all points from collection, letting Qdrant project the payload
+        # to the requested fields and skip the vectors
+        points, _ = vector_db.scroll(
+            collection_name="products",
+            limit=limit,
+            with_payload=fields or _PRODUCT_PAYLOAD,
+            with_vectors=False,
+        )
 
-        products = []
-        for point in points:
-            product = point.payload.copy()
-            product["id"] = point.id
-            products.append(product)
+        products = [{**point.payload, "id": point.id} for point in points]
 
-        print(f"Retrieved {len(products)} products from vector database")
+        logger.debug("Retrieved %d products from vector database", len(products))
         return products
 
     except Exception as e:
-        print(f"Error getting all products from vector database: {e}")
+        logger.error("Error getting all products from vector database: %s", e)
         return []
@@ -1,16 +1,43 @@
+import io
 import os
 import requests
 import json
 import base64
 import uuid
+from functools import lru_cache
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
 from typing import Literal
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
+from requests.adapters import HTTPAdapter
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 
 load_dotenv()
 
+# Shared session so repeated try-ons reuse pooled TLS connections to OpenRouter
+_openrouter_session = requests.Session()
+_openrouter_session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=50))
+
+# OpenRouter responses worth retrying: rate limiting and transient server errors
+_RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Base64 characters decoded per step (a multiple of 4, so chunks decode independently)
+_BASE64_CHUNK_SIZE = 1 << 20
+
+# Multipart uploads for large generated images, with parts sent in parallel
+_S3_TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 << 20, max_concurrency=4)
+
+# Prefixes of image inputs passed by URL
+_URL_PREFIXES = ("http://", "https://")
+
 
 def get_openrouter_api_key():
     """Get OpenRouter API key from environment variable"""
@@ -29,8 +56,9 @@ def get_aws_config():
     }
 
 
+@lru_cache(maxsize=1)
 def get_s3_client():
-    """Get S3 client with proper configuration"""
+    """Get S3 client with proper configuration, created once and reused"""
     config = get_aws_config()
 
     if not config["aws_access_key_id"] or not config["aws_secret_access_key"]:
@@ -47,9 +75,43 @@ def get_s3_client():
         aws_secret_access_key=config["aws_secret_access_key"],
         region_name=config["region_name"],
         endpoint_url=config["endpoint_url"] if config["endpoint_url"] else None,
+        # Retry throttled and failed requests with client-side rate adaptation
+        config=Config(retries={"max_attempts": 5, "mode": "adaptive"}),
     )
 
 
+def _is_retryable_openrouter_error(error: BaseException) -> bool:
+    """Check whether an OpenRouter request failure is transient"""
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    return (
+        isinstance(error, requests.HTTPError)
+        and error.response is not None
+        and error.response.status_code in _RETRYABLE_STATUS_CODES
+    )
+
+
+@retry(
+    retry=retry_if_exception(_is_retryable_openrouter_error),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=0.5, max=4),
+    reraise=True,
+)
+def _post_openrouter_completion(
+    headers: Dict[str, str], payload: Dict[str, Any]
+) -> Dict[str, Any]:
+    """POST a chat completion to OpenRouter, retrying transient failures"""
+    response = _openrouter_session.post(
+        "https://openrouter.ai/api/v1/chat/completions",
+        headers=headers,
+        data=json.dumps(payload),
+        timeout=60,
+    )
+
+    response.raise_for_status()
+    return response.json()
+
+
 def generate_image_with_openrouter(
     api_key: str, prompt: str, image_urls: list
 ) -> Optional[str]:
@@ -76,15 +138,7 @@ def generate_image_with_openrouter(
             "X-Title": "LeLook MCP Server",
         }
 
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            data=json.dumps(payload),
-            timeout=60,
-        )
-
-        response.raise_for_status()
-        result = response.json()
+        result = _post_openrouter_completion(headers, payload)
 
         # Extract the generated image from the response
         if "choices" in result and len(result["choices"]) > 0:
@@ -104,6 +158,18 @@ def generate_image_with_openrouter(
         return None
 
 
+def _decode_base64_to_buffer(encoded_data: str) -> io.BytesIO:
+    """Decode base64 data chunk by chunk into a buffer ready to be uploaded"""
+    if any(c in encoded_data for c in " \t\r\n"):
+        encoded_data = "".join(encoded_data.split())
+
+    buffer = io.BytesIO()
+    for start in range(0, len(encoded_data), _BASE64_CHUNK_SIZE):
+        buffer.write(base64.b64decode(encoded_data[start : start + _BASE64_CHUNK_SIZE]))
+    buffer.seek(0)
+    return buffer
+
+
 def upload_image_to_s3(image_data: str) -> str:
     """
     Upload image to S3 and return the public URL.
@@ -121,7 +187,8 @@ def upload_image_to_s3(image_data: str) -> str:
     """
     try:
         # If it's already a URL, return it
-        if is_url(image_data):
+        image_kind = classify_image_data(image_data)
+        if image_kind == "url":
             return image_data
 
         # Get S3 client and configuration
@@ -133,25 +200,28 @@ def upload_image_to_s3(image_data: str) -> str:
         image_key = f"virtual-try-on/{uuid.uuid4()}.png"
 
         # Handle different image data formats
-        if image_data.startswith("data:image"):
+        if image_kind == "data_url":
             # Data URL format: data:image/png;base64,/9j/4AAQSkZJRgABAQAAAQ...
             header, encoded_data = image_data.split(",", 1)
-            image_bytes = base64.b64decode(encoded_data)
+            image_buffer = _decode_base64_to_buffer(encoded_data)
 
             # Extract content type from data URL
             content_type = header.split(";")[0].split(":")[1]  # image/png
         else:
             # Assume it's base64 encoded data
-            image_bytes = base64.b64decode(image_data)
+            image_buffer = _decode_base64_to_buffer(image_data)
             content_type = "image/png"
 
         # Upload to S3
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=image_key,
-            Body=image_bytes,
-            ContentType=content_type,
-            ACL="public-read",  # Make the image publicly accessible
+        s3_client.upload_fileobj(
+            image_buffer,
+            bucket_name,
+            image_key,
+            ExtraArgs={
+                "ContentType": content_type,
+                "ACL": "public-read",  # Make the image publicly accessible
+            },
+            Config=_S3_TRANSFER_CONFIG,
         )
 
         # Generate public URL
@@ -162,30 +232,53 @@ def upload_image_to_s3(image_data: str) -> str:
 
     except NoCredentialsError as e:
         print(f"AWS credentials error: {e}")
-        # Fallback: return original data if it's a URL, otherwise return as-is
-        return image_data if is_url(image_data) else image_data
+        # Fallback: return the original data as-is
+        return image_data
 
     except ValueError as e:
         print(f"Configuration error: {e}")
-        # Fallback: return original data if it's a URL, otherwise return as-is
-        return image_data if is_url(image_data) else image_data
+        # Fallback: return the original data as-is
+        return image_data
 
     except ClientError as e:
         print(f"S3 upload error: {e}")
-        # Fallback: return original data if it's a URL, otherwise return as-is
-        return image_data if is_url(image_data) else image_data
+        # Fallback: return the original data as-is
+        return image_data
 
     except Exception as e:
         print(f"Unexpected error uploading to S3: {e}")
-        # Fallback: return original data if it's a URL, otherwise return as-is
-        return image_data if is_url(image_data) else image_data
+        # Fallback: return the original data as-is
+        return image_data
 
 
 def is_url(image_data: str) -> bool:
     """Check if the input is a URL"""
-    return image_data.startswith(("http://", "https://"))
+    return image_data.startswith(_URL_PREFIXES)
+
+
+def classify_image_data(image_data: str) -> str:
+    """
+    Classify image input by its prefix.
+
+    Returns:
+        str: "url", "data_url" or "base64"
+    """
+    head = image_data[:16]
+    if head.startswith(_URL_PREFIXES):
+        return "url"
+    if head.startswith("data:image"):
+        return "data_url"
+    return "base64"
+
+
+def _to_image_url(image_data: str) -> str:
+    """Get a URL for OpenRouter, wrapping raw base64 data in a data URL"""
+    if classify_image_data(image_data) == "base64":
+        return f"data:image/jpeg;base64,{image_data}"
+    return image_data
 
 
+@lru_cache(maxsize=512)
 def create_clothing_try_on_prompt(product_description: str = "clothing item") -> str:
     """Create a prompt for clothing virtual try-on"""
     return f"""Create a realistic image showing this person wearing this {product_description}. 
@@ -194,6 +287,7 @@ def create_clothing_try_on_prompt(product_description: str = "clothing item") ->
     Make sure the clothing looks natural and realistic on the person."""
 
 
+@lru_cache(maxsize=512)
 def create_furniture_try_on_prompt(product_description: str = "furniture item") -> str:
     """Create a prompt for furniture virtual try-on/placement"""
     return f"""Create a realistic image showing this {product_description} placed in a modern, well-lit room. 
@@ -202,6 +296,7 @@ def create_furniture_try_on_prompt(product_description: str = "furniture item")
     Make sure the furniture looks natural and realistic in the room setting."""
 
 
+@lru_cache(maxsize=512)
 def create_phone_try_on_prompt(product_description: str = "phone item") -> str:
     """Create a prompt for phone virtual try-on"""
     return f"""Create a realistic image showing this person holding this {product_description}. 
@@ -210,6 +305,7 @@ def create_phone_try_on_prompt(product_description: str = "phone item") -> str:
     Make sure the phone looks natural and realistic in the person's hand."""
 
 
+@lru_cache(maxsize=512)
 def create_car_try_on_prompt(product_description: str = "car") -> str:
     """Create a prompt for car virtual try-on/visualization"""
     return f"""Create a realistic image showing this {product_description} parked in a modern, well-lit driveway or street setting. 
@@ -218,6 +314,7 @@ def create_car_try_on_prompt(product_description: str = "car") -> str:
     Make sure the car looks natural and realistic in the driveway/street environment."""
 
 
+@lru_cache(maxsize=512)
 def create_house_try_on_prompt(product_description: str = "house") -> str:
     """Create a prompt for house virtual try-on/visualization"""
     return f"""Create a realistic image showing this {product_description} placed in a modern, well-lit neighborhood setting. 
@@ -226,6 +323,7 @@ def create_house_try_on_prompt(product_description: str = "house") -> str:
     Make sure the house looks natural and realistic in the neighborhood environment."""
 
 
+@lru_cache(maxsize=512)
 def create_other_try_on_prompt(product_description: str = "other item") -> str:
     """Create a prompt for other virtual try-on"""
     return f"""Create a realistic image showing this {product_description} placed in a modern, well-lit room. 
@@ -234,6 +332,17 @@ def create_other_try_on_prompt(product_description: str = "other item") -> str:
     Make sure the {product_description} looks natural and realistic in the room setting."""
 
 
+# Prompt builder for each try-on category; unknown categories use clothing
+_PROMPT_BUILDERS = {
+    "clothing": create_clothing_try_on_prompt,
+    "furniture": create_furniture_try_on_prompt,
+    "other": create_other_try_on_prompt,
+    "phone": create_phone_try_on_prompt,
+    "car": create_car_try_on_prompt,
+    "house": create_house_try_on_prompt,
+}
+
+
 def virtual_try_on(
     product_description: str,
     product_image_data: str,
@@ -262,45 +371,17 @@ def virtual_try_on(
                 "category": category,
             }
 
-        # Validate and prepare image URLs for OpenRouter
-        image_urls = []
-
-        # Process product image - convert to URL if needed
-        if is_url(product_image_data):
-            image_urls.append(product_image_data)
-        else:
-            # For base64 data, we need to convert it to a data URL
-            if product_image_data.startswith("data:image"):
-                image_urls.append(product_image_data)
-            else:
-                # Convert base64 to data URL
-                image_urls.append(f"data:image/jpeg;base64,{product_image_data}")
+        # Prepare image URLs for OpenRouter, classifying each input once
+        image_urls = [_to_image_url(product_image_data)]
 
         # Add user image if provided
         if user_image_data:
-            if is_url(user_image_data):
-                image_urls.append(user_image_data)
-            else:
-                # For base64 data, convert to data URL
-                if user_image_data.startswith("data:image"):
-                    image_urls.append(user_image_data)
-                else:
-                    # Convert base64 to data URL
-                    image_urls.append(f"data:image/jpeg;base64,{user_image_data}")
+            image_urls.append(_to_image_url(user_image_data))
 
         # Create appropriate prompt based on try-on type
-        if category == "furniture":
-            prompt = create_furniture_try_on_prompt(product_description)
-        elif category == "other":
-            prompt = create_other_try_on_prompt(product_description)
-        elif category == "phone":
-            prompt = create_phone_try_on_prompt(product_description)
-        elif category == "car":
-            prompt = create_car_try_on_prompt(product_description)
-        elif category == "house":
-            prompt = create_house_try_on_prompt(product_description)
-        else:
-            prompt = create_clothing_try_on_prompt(product_description)
+        prompt = _PROMPT_BUILDERS.get(category, create_clothing_try_on_prompt)(
+            product_description
+        )
 
         # Generate image using OpenRouter with URLs
         try:
@@ -2,309 +2,57 @@
 HTML Generator for Virtual Try-On Results
 """
 
-from typing import Dict, Any, Optional
-import json
-import base64
-from urllib.parse import quote
-
-
-def generate_virtual_try_on_html(
-    product_image_data: str,
-    user_image_data: str,
-    result_image_data: str,
-) -> str:
-    """
-    Generate HTML for displaying virtual try-on results.
-
-    Args:
-        product_image_data: Product image as URL or base64 data
-        user_image_data: User image as URL or base64 data
-        result_image_data: Generated result image as URL or base64 data
-        product_description: Description of the product
-        category: Product category (clothing, furniture, phone, other)
-        success: Whether the virtual try-on was successful
-        ai_generated: Whether the result was AI generated
-        error: Error message if any
-        **kwargs: Additional data to include
-
-    Returns:
-        Complete HTML string for displaying virtual try-on results
-    """
-
-    html_template = f"""<!DOCTYPE html>
+import operator
+import os
+import re
+import textwrap
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Iterator, Tuple, Union
+
+try:
+    # pybase64 encodes multi-megabyte images several times faster (SIMD codec)
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
+
+# Comments, whitespace runs, gaps between tags and spaces around CSS
+# punctuation, removed when minifying the static markup
+_COMMENT_RE = re.compile(r"<!--.*?-->|/\*.*?\*/", re.DOTALL)
+_WHITESPACE_RE = re.compile(r"\s+")
+_TAG_GAP_RE = re.compile(r">\s+<")
+_CSS_PUNCTUATION_RE = re.compile(r"\s*([{};])\s*")
+
+
+def _minify(markup: str) -> str:
+    """Strip comments and collapse whitespace in static HTML/CSS"""
+    markup = _COMMENT_RE.sub("", markup)
+    markup = _WHITESPACE_RE.sub(" ", markup)
+    markup = _TAG_GAP_RE.sub("><", markup)
+    return _CSS_PUNCTUATION_RE.sub(r"\1", markup).strip()
+
+
+# Page stylesheet, kept as a static asset so it can be served and cached
+# separately from the per-result HTML. Static markup is minified once at import
+# under python -O, and kept readable otherwise.
+STYLESHEET_PATH = Path(__file__).parent / "static" / "virtual_try_on.css"
+STYLESHEET = STYLESHEET_PATH.read_text()
+if not __debug__:
+    STYLESHEET = _minify(STYLESHEET)
+
+# Public URL the stylesheet is served from (e.g. the server's
+# /static/virtual_try_on.css route); when set, pages link to it instead of
+# inlining it
+STYLESHEET_URL = os.getenv("VIRTUAL_TRY_ON_CSS_URL")
+
+# Page shell; only the three image sources vary per call
+_HTML_TEMPLATE = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Virtual Try-On Results</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }}
-
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 20px;
-            box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1);
-            overflow: hidden;
-        }}
-
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 30px;
-            text-align: center;
-        }}
-
-        .header h1 {{
-            font-size: 2.5rem;
-            margin-bottom: 10px;
-            font-weight: 300;
-        }}
-
-        .header p {{
-            font-size: 1.1rem;
-            opacity: 0.9;
-        }}
-
-        .content {{
-            padding: 40px;
-        }}
-
-        .image-grid {{
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 30px;
-            margin-bottom: 40px;
-        }}
-
-        .image-card {{
-            background: #f8f9fa;
-            border-radius: 15px;
-            padding: 20px;
-            text-align: center;
-            box-shadow: 0 10px 25px rgba(0, 0, 0, 0.1);
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-        }}
-
-        .image-card:hover {{
-            transform: translateY(-5px);
-            box-shadow: 0 15px 35px rgba(0, 0, 0, 0.15);
-        }}
-
-        .image-card h3 {{
-            color: #333;
-            margin-bottom: 15px;
-            font-size: 1.3rem;
-            font-weight: 600;
-        }}
-
-        .image-label {{
-            color: #6c757d;
-            font-size: 0.9rem;
-            font-weight: 600;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            margin-bottom: 10px;
-            text-align: center;
-        }}
-
-        .image-container {{
-            position: relative;
-            width: 100%;
-            height: 300px;
-            border-radius: 10px;
-            overflow: hidden;
-            background: #e9ecef;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }}
-
-        .image-container img {{
-            max-width: 100%;
-            max-height: 100%;
-            object-fit: cover;
-            border-radius: 10px;
-            transition: transform 0.3s ease;
-        }}
-
-        .image-container img:hover {{
-            transform: scale(1.05);
-        }}
-
-        .loading-placeholder {{
-            color: #6c757d;
-            font-size: 1.1rem;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            height: 100%;
-        }}
-
-        .result-card {{
-            background: linear-gradient(135deg, #28a745 0%, #20c997 100%);
-            color: white;
-            border-radius: 15px;
-            padding: 20px;
-            text-align: center;
-            box-shadow: 0 10px 25px rgba(40, 167, 69, 0.3);
-            position: relative;
-            overflow: hidden;
-        }}
-
-        .result-card::before {{
-            content: '';
-            position: absolute;
-            top: -50%;
-            left: -50%;
-            width: 200%;
-            height: 200%;
-            background: linear-gradient(45deg, transparent, rgba(255, 255, 255, 0.1), transparent);
-            transform: rotate(45deg);
-            animation: shimmer 3s infinite;
-        }}
-
-        @keyframes shimmer {{
-            0% {{ transform: translateX(-100%) translateY(-100%) rotate(45deg); }}
-            100% {{ transform: translateX(100%) translateY(100%) rotate(45deg); }}
-        }}
-
-        .result-card h3 {{
-            font-size: 1.5rem;
-            margin-bottom: 15px;
-            position: relative;
-            z-index: 1;
-        }}
-
-        .result-image-container {{
-            position: relative;
-            width: 100%;
-            height: 400px;
-            border-radius: 10px;
-            overflow: hidden;
-            background: rgba(255, 255, 255, 0.1);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            z-index: 1;
-        }}
-
-        .result-image-container img {{
-            max-width: 100%;
-            max-height: 100%;
-            object-fit: cover;
-            border-radius: 10px;
-            transition: transform 0.3s ease;
-        }}
-
-        .result-image-container img:hover {{
-            transform: scale(1.05);
-        }}
-
-        .product-info {{
-            background: #f8f9fa;
-            border-radius: 15px;
-            padding: 25px;
-            margin-top: 30px;
-        }}
-
-        .product-info h4 {{
-            color: #333;
-            margin-bottom: 15px;
-            font-size: 1.4rem;
-        }}
-
-        .info-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-        }}
-
-        .info-item {{
-            display: flex;
-            flex-direction: column;
-        }}
-
-        .info-label {{
-            font-weight: 600;
-            color: #6c757d;
-            margin-bottom: 5px;
-            font-size: 0.9rem;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-        }}
-
-        .info-value {{
-            color: #333;
-            font-size: 1.1rem;
-        }}
-
-        .error-message {{
-            background: #f8d7da;
-            color: #721c24;
-            padding: 20px;
-            border-radius: 10px;
-            text-align: center;
-            margin: 20px 0;
-        }}
-
-        .success-badge {{
-            display: inline-block;
-            background: #28a745;
-            color: white;
-            padding: 5px 15px;
-            border-radius: 20px;
-            font-size: 0.9rem;
-            font-weight: 600;
-            margin-bottom: 15px;
-        }}
-
-        .category-badge {{
-            display: inline-block;
-            background: #6c757d;
-            color: white;
-            padding: 5px 15px;
-            border-radius: 20px;
-            font-size: 0.9rem;
-            font-weight: 600;
-            margin-left: 10px;
-        }}
-
-        @media (max-width: 768px) {{
-            .image-grid {{
-                grid-template-columns: 1fr;
-            }}
-            
-            .header h1 {{
-                font-size: 2rem;
-            }}
-            
-            .content {{
-                padding: 20px;
-            }}
-        }}
-
-        .fade-in {{
-            animation: fadeIn 0.6s ease-in;
-        }}
-
-        @keyframes fadeIn {{
-            from {{ opacity: 0; transform: translateY(20px); }}
-            to {{ opacity: 1; transform: translateY(0); }}
-        }}
-    </style>
+    $stylesheet
 </head>
 <body>
     <div class="container">
@@ -318,14 +66,14 @@ def generate_virtual_try_on_html(
                 <!-- Product Image Card -->
                 <div class="image-card fade-in">
                     <div class="image-container">
-                        <img src="{product_image_data}" alt="Product Image">
+                        <img src="$product_image_data" alt="Product Image">
                     </div>
                 </div>
 
                 <!-- User Image Card -->
                 <div class="image-card fade-in">
                     <div class="image-container">
-                        <img src="{user_image_data}" alt="User Image">
+                        <img src="$user_image_data" alt="User Image">
                     </div>
                 </div>
             </div>
@@ -334,7 +82,7 @@ def generate_virtual_try_on_html(
             <div class="result-card fade-in">
                 <h3>Virtual Try-On Result</h3>
                 <div class="result-image-container">
-                    <img src="{result_image_data}" alt="Virtual Try-On Result">
+                    <img src="$result_image_data" alt="Virtual Try-On Result">
                 </div>
             </div>
         </div>
@@ -342,7 +90,201 @@ def generate_virtual_try_on_html(
 </body>
 </html>"""
 
-    return html_template
+
+def _stylesheet_tag() -> str:
+    """Get the tag that applies the page stylesheet"""
+    if STYLESHEET_URL:
+        return f'<link rel="stylesheet" href="{STYLESHEET_URL}">'
+    return f"<style>\n{textwrap.indent(STYLESHEET, ' ' * 8)}    </style>"
+
+
+# Image sources that can be used as an <img> src unchanged
+_DIRECT_SRC_PREFIXES = ("http://", "https://", "data:")
+
+# Leading bytes of the image formats recognized in raw image data
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG", b"image/png"),
+    (b"\xff\xd8", b"image/jpeg"),
+    (b"GIF8", b"image/gif"),
+    (b"RIFF", b"image/webp"),
+)
+
+# Only pages whose image sources total at most this many characters are
+# memoized, so cached pages never pin multi-megabyte base64 images in memory
+_MAX_CACHED_SOURCES_LENGTH = 16 * 1024
+
+# Image placeholders in _HTML_TEMPLATE, in page order
+_PLACEHOLDERS = ("$product_image_data", "$user_image_data", "$result_image_data")
+
+
+def _split_template(template: str) -> Tuple[str, ...]:
+    """Split a page template into the static parts around its image placeholders"""
+    parts = []
+    for placeholder in _PLACEHOLDERS:
+        head, template = template.split(placeholder)
+        parts.append(head)
+    parts.append(template)
+    return tuple(parts)
+
+
+# Page with its stylesheet filled in, minified under python -O
+_PAGE = _HTML_TEMPLATE.replace("$stylesheet", _stylesheet_tag())
+if not __debug__:
+    _PAGE = _minify(_PAGE)
+
+# Static page parts, split once at import: head, product/user gap,
+# user/result gap and tail
+_PARTS = _split_template(_PAGE)
+_PARTS_BYTES = tuple(part.encode() for part in _PARTS)
+
+
+def _data_uri_bytes(image_bytes: bytes) -> bytes:
+    """Encode raw image bytes as a base64 data URI, without a str round-trip"""
+    content_type = next(
+        (
+            content_type
+            for signature, content_type in _IMAGE_SIGNATURES
+            if image_bytes.startswith(signature)
+        ),
+        b"image/png",
+    )
+    return b"data:%s;base64,%s" % (content_type, _b64encode(memoryview(image_bytes)))
+
+
+def _image_src(image_data: Union[str, bytes]) -> str:
+    """
+    Get the <img> src for an image.
+
+    URLs and data URIs are used as-is, without copying; raw base64 data and raw
+    image bytes are wrapped in a data URI.
+    """
+    if isinstance(image_data, bytes):
+        return _data_uri_bytes(image_data).decode("ascii")
+    if not image_data or image_data.startswith(_DIRECT_SRC_PREFIXES):
+        return image_data
+    return "data:image/jpeg;base64," + image_data
+
+
+def _as_bytes(image_data: Union[str, bytes]) -> bytes:
+    """Get the <img> src for an image as bytes for the bytes page"""
+    if isinstance(image_data, bytes):
+        return _data_uri_bytes(image_data)
+    return _image_src(image_data).encode()
+
+
+def iter_virtual_try_on_html(
+    product_image_data: Union[str, bytes],
+    user_image_data: Union[str, bytes],
+    result_image_data: Union[str, bytes],
+) -> Iterator[str]:
+    """
+    Yield the virtual try-on results page segment by segment.
+
+    Lets callers stream the page (e.g. a Starlette StreamingResponse or a WSGI
+    response body) without materializing it as one string.
+
+    Args:
+        product_image_data: Product image as URL, base64 data or raw bytes
+        user_image_data: User image as URL, base64 data or raw bytes
+        result_image_data: Generated result image as URL, base64 data or raw bytes
+
+    Yields:
+        The static page parts interleaved with the three image sources
+    """
+    yield _PARTS[0]
+    yield _image_src(product_image_data)
+    yield _PARTS[1]
+    yield _image_src(user_image_data)
+    yield _PARTS[2]
+    yield _image_src(result_image_data)
+    yield _PARTS[3]
+
+
+@lru_cache(maxsize=256)
+def _render_html_cached(
+    product_image_data: Union[str, bytes],
+    user_image_data: Union[str, bytes],
+    result_image_data: Union[str, bytes],
+) -> str:
+    """Render the page, memoized for repeated renders of the same images"""
+    return "".join(
+        iter_virtual_try_on_html(product_image_data, user_image_data, result_image_data)
+    )
+
+
+def generate_virtual_try_on_html(
+    product_image_data: Union[str, bytes],
+    user_image_data: Union[str, bytes],
+    result_image_data: Union[str, bytes],
+) -> str:
+    """
+    Generate HTML for displaying virtual try-on results.
+
+    Equivalent to "".join(iter_virtual_try_on_html(...)). Pages for short
+    (URL) image sources are memoized; see clear_virtual_try_on_html_cache.
+
+    Args:
+        product_image_data: Product image as URL, base64 data or raw bytes
+        user_image_data: User image as URL, base64 data or raw bytes
+        result_image_data: Generated result image as URL, base64 data or raw bytes
+
+    Returns:
+        Complete HTML string for displaying virtual try-on results
+    """
+
+    if (
+        len(product_image_data) + len(user_image_data) + len(result_image_data)
+        <= _MAX_CACHED_SOURCES_LENGTH
+    ):
+        return _render_html_cached(
+            product_image_data, user_image_data, result_image_data
+        )
+    return "".join(
+        iter_virtual_try_on_html(product_image_data, user_image_data, result_image_data)
+    )
+
+
+def clear_virtual_try_on_html_cache():
+    """Drop all memoized virtual try-on pages"""
+    _render_html_cached.cache_clear()
+
+
+def generate_virtual_try_on_html_bytes(
+    product_image_data: Union[str, bytes],
+    user_image_data: Union[str, bytes],
+    result_image_data: Union[str, bytes],
+) -> bytes:
+    """
+    Generate the virtual try-on results page as UTF-8 encoded bytes.
+
+    Same page as generate_virtual_try_on_html, for callers that write the HTML
+    to a socket or file and would otherwise encode the whole string.
+
+    Args:
+        product_image_data: Product image as URL, base64 data or raw bytes
+        user_image_data: User image as URL, base64 data or raw bytes
+        result_image_data: Generated result image as URL, base64 data or raw bytes
+
+    Returns:
+        Complete UTF-8 encoded HTML for displaying virtual try-on results
+    """
+
+    return b"".join(
+        (
+            _PARTS_BYTES[0],
+            _as_bytes(product_image_data),
+            _PARTS_BYTES[1],
+            _as_bytes(user_image_data),
+            _PARTS_BYTES[2],
+            _as_bytes(result_image_data),
+            _PARTS_BYTES[3],
+        )
+    )
+
+
+# Result image getter bound once; itemgetter runs in C and skips the per-call
+# dict.get method lookup
+_get_result = operator.itemgetter("result_image_data")
 
 
 def generate_virtual_try_on_html_from_result(
@@ -353,18 +295,26 @@ def generate_virtual_try_on_html_from_result(
     """
     Generate HTML from a virtual try-on result dictionary.
 
+    Prefer passing images by URL: URLs are referenced as-is, while base64
+    images are inlined and grow the page by a third of the image size.
+
     Args:
         virtual_try_on_result: Result from virtual_try_on function
         product_image_data: Product image as URL or base64 data
         user_image_data: User image as URL or base64 data
-        product_description: Description of the product
 
     Returns:
         Complete HTML string for displaying virtual try-on results
     """
 
+    # result_image_data already holds the S3 URL when the upload succeeded
+    try:
+        result_image_data = _get_result(virtual_try_on_result)
+    except KeyError:
+        result_image_data = ""
+
     return generate_virtual_try_on_html(
         product_image_data=product_image_data,
         user_image_data=user_image_data,
-        result_image_data=virtual_try_on_result.get("result_image_data", ""),
+        result_image_data=result_image_data,
     )